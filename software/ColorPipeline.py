@@ -0,0 +1,90 @@
+from array import array
+
+
+class ColorPipeline:
+    """Gamma corrected and brightness scaled colors without float math per frame.
+
+    The gamma curve is stored in 8.8 fixed point. Changing the brightness or
+    the color rebuilds the level table and the scaled color, the strip itself
+    stays at brightness 1.0. The fractional part that does not fit into 8 bits
+    can be spread over frames and pixels (temporal dithering). Only dim colors
+    are dithered, one step more is barely visible on brighter ones.
+    """
+
+    # no dithering from this level on
+    DITHER_MAX_LEVEL = 8
+    # fractions below this (out of 256) are dropped
+    DITHER_MIN_FRACTION = 16
+
+    def __init__(self, gamma=2.6):
+        self.gamma = array("H", [int(((v / 255) ** gamma) * 255 * 256 + 0.5) for v in range(256)])
+        self.levels = array("H", self.gamma)
+        self.brightness = 1.0
+        self.color = (0, 0, 0)
+        # integer and fractional (0-255) part of every channel after gamma and brightness
+        self.base = (0, 0, 0)
+        self.fraction = (0, 0, 0)
+        self.frame = 0
+
+    def set_brightness(self, brightness):
+        brightness = min(max(brightness, 0.0), 1.0)
+        if brightness == self.brightness:
+            return False
+        self.brightness = brightness
+        scale = int(brightness * 256 + 0.5)
+        for v in range(256):
+            self.levels[v] = (self.gamma[v] * scale) >> 8
+        self.update()
+        return True
+
+    def set_color(self, color):
+        if color == self.color:
+            return False
+        self.color = color
+        self.update()
+        return True
+
+    def update(self):
+        levels = self.levels
+        r, g, b = (levels[c] for c in self.color)
+        base = [r >> 8, g >> 8, b >> 8]
+        fraction = [r & 0xFF, g & 0xFF, b & 0xFF]
+
+        # keep a dim but configured color from vanishing completely: the brightest
+        # channels get level 1, the others keep their ratio as dithering fraction
+        if base == [0, 0, 0] and self.color != (0, 0, 0):
+            weights = [self.gamma[c] for c in self.color]
+            if max(weights) == 0:
+                weights = list(self.color)
+            brightest = max(weights)
+            for c in range(3):
+                if weights[c] == brightest:
+                    base[c] = 1
+                    fraction[c] = 0
+                else:
+                    fraction[c] = (weights[c] << 8) // brightest
+
+        if max(base) >= self.DITHER_MAX_LEVEL:
+            fraction = [0, 0, 0]
+        else:
+            fraction = [f if f >= self.DITHER_MIN_FRACTION else 0 for f in fraction]
+
+        self.base = tuple(base)
+        self.fraction = tuple(fraction)
+
+    def is_dithering(self):
+        return self.fraction != (0, 0, 0)
+
+    def next_frame(self):
+        self.frame = (self.frame + 1) & 0xFF
+
+    def get_dithered(self, pixel):
+        """Color of one pixel in the current frame, spread by frame and pixel index."""
+        threshold = (self.frame * 61 + pixel * 149) & 0xFF
+        r, g, b = self.base
+        fr, fg, fb = self.fraction
+        return (
+            min(r + (threshold < fr), 255),
+            min(g + (threshold < fg), 255),
+            min(b + (threshold < fb), 255),
+        )
@@ -0,0 +1,217 @@
+import struct
+import binascii
+
+
+class NvmStore:
+    """Hot runtime state and a shadow of config.json in microcontroller.nvm.
+
+    The first bytes hold STATE_SLOTS fixed size state records, every write goes
+    to the slot after the newest one so the writes are spread over all slots.
+    The rest holds the config shadow, the known config keys packed with struct
+    and tagged with size and mtime of config.json so a changed file is noticed
+    and read again. A config that can not be packed exactly (unknown keys or
+    value types) gets no shadow and is read from the file.
+    """
+
+    VERSION = 2
+
+    STATE_MAGIC = b"WS"
+    # magic, version, sequence
+    STATE_HEADER_FORMAT = "<2sBI"
+    STATE_HEADER_SIZE = struct.calcsize(STATE_HEADER_FORMAT)
+    # flags, ssid index, tz offset, last sync
+    STATE_FORMAT = "<BbfI"
+    STATE_SIZE = STATE_HEADER_SIZE + struct.calcsize(STATE_FORMAT)
+    STATE_SLOT_SIZE = 32
+    STATE_SLOTS = 8
+
+    STATE_LIGHT_ALLOWED = 0x01
+
+    CONFIG_MAGIC = b"WC"
+    CONFIG_VERSION = 3
+    # magic, version, config.json size, config.json mtime, payload length
+    CONFIG_HEADER_FORMAT = "<2sBIIH"
+    CONFIG_HEADER_SIZE = struct.calcsize(CONFIG_HEADER_FORMAT)
+    CONFIG_OFFSET = STATE_SLOT_SIZE * STATE_SLOTS
+    # flags, r, g, b, tz, brightness, wifi entries; followed by length prefixed
+    # ssid and password of every entry and the upload password
+    CONFIG_FORMAT = "<BBBBffB"
+    CONFIG_SIZE = struct.calcsize(CONFIG_FORMAT)
+    CONFIG_KEYS = ("wifi", "color", "tz", "auto_dst", "auto_brightness", "brightness", "dither", "upload_password")
+
+    CONFIG_AUTO_DST = 0x01
+    CONFIG_AUTO_BRIGHTNESS = 0x02
+    CONFIG_DITHER = 0x04
+    CONFIG_HAS_DITHER = 0x08
+    CONFIG_TZ_INT = 0x10
+    CONFIG_BRIGHTNESS_INT = 0x20
+    CONFIG_HAS_PASSWORD = 0x40
+
+    def __init__(self, nvm):
+        self.nvm = nvm
+        self.state_seq = 0
+        self.state_slot = -1
+        self.state = None
+
+    def read_state(self):
+        data = self.nvm[0:self.CONFIG_OFFSET]
+        view = memoryview(data)
+
+        for slot in range(self.STATE_SLOTS):
+            offset = slot * self.STATE_SLOT_SIZE
+            magic, version, seq = struct.unpack_from(self.STATE_HEADER_FORMAT, view, offset)
+            if magic != self.STATE_MAGIC or version != self.VERSION:
+                continue
+            crc = struct.unpack_from("<I", view, offset + self.STATE_SIZE)[0]
+            if crc != binascii.crc32(view[offset:offset + self.STATE_SIZE]):
+                continue
+            if self.state_slot < 0 or seq > self.state_seq:
+                self.state_seq = seq
+                self.state_slot = slot
+                self.state = bytes(view[offset + self.STATE_HEADER_SIZE:offset + self.STATE_SIZE])
+
+        if self.state is None:
+            return None
+
+        flags, ssid_index, tz_offset, last_sync = struct.unpack(self.STATE_FORMAT, self.state)
+        return {
+            "is_light_allowed": bool(flags & self.STATE_LIGHT_ALLOWED),
+            "ssid_index": ssid_index,
+            "tz_offset": tz_offset,
+            "last_sync": last_sync,
+        }
+
+    def write_state(self, is_light_allowed, ssid_index, tz_offset, last_sync):
+        flags = self.STATE_LIGHT_ALLOWED if is_light_allowed else 0
+        state = struct.pack(self.STATE_FORMAT, flags, ssid_index, tz_offset, int(last_sync))
+        # nothing changed, don't touch the nvm
+        if state == self.state:
+            return False
+
+        record = struct.pack(self.STATE_HEADER_FORMAT, self.STATE_MAGIC, self.VERSION, self.state_seq + 1) + state
+        record += struct.pack("<I", binascii.crc32(record))
+
+        slot = (self.state_slot + 1) % self.STATE_SLOTS
+        offset = slot * self.STATE_SLOT_SIZE
+        self.nvm[offset:offset + len(record)] = record
+
+        self.state_seq += 1
+        self.state_slot = slot
+        self.state = state
+        return True
+
+    def read_config(self, stamp):
+        header = self.nvm[self.CONFIG_OFFSET:self.CONFIG_OFFSET + self.CONFIG_HEADER_SIZE]
+        magic, version, size, mtime, length = struct.unpack(self.CONFIG_HEADER_FORMAT, header)
+        if magic != self.CONFIG_MAGIC or version != self.CONFIG_VERSION or (size, mtime) != stamp:
+            return None
+
+        start = self.CONFIG_OFFSET + self.CONFIG_HEADER_SIZE
+        if length < self.CONFIG_SIZE or start + length + 4 > len(self.nvm):
+            return None
+        data = self.nvm[start:start + length + 4]
+        view = memoryview(data)
+        if struct.unpack_from("<I", view, length)[0] != binascii.crc32(view[:length]):
+            return None
+
+        return self.unpack_config(view)
+
+    def write_config(self, config, stamp):
+        payload = self.pack_config(config)
+        if payload is not None:
+            record = struct.pack(self.CONFIG_HEADER_FORMAT, self.CONFIG_MAGIC, self.CONFIG_VERSION, stamp[0], stamp[1], len(payload))
+            record += payload + struct.pack("<I", binascii.crc32(payload))
+            if self.CONFIG_OFFSET + len(record) <= len(self.nvm):
+                self.nvm[self.CONFIG_OFFSET:self.CONFIG_OFFSET + len(record)] = record
+                return True
+
+        # drop an older shadow, the file is read on every boot
+        self.nvm[self.CONFIG_OFFSET:self.CONFIG_OFFSET + 2] = b"\0\0"
+        return False
+
+    def pack_config(self, config):
+        """Pack the config, None if it would not come back exactly as it is."""
+        if any(key not in self.CONFIG_KEYS for key in config):
+            return None
+        for key in ("wifi", "color", "tz", "auto_dst", "auto_brightness", "brightness"):
+            if key not in config:
+                return None
+
+        color = config["color"]
+        if type(color) is not dict or len(color) != 3 or not all(key in color for key in ("r", "g", "b")):
+            return None
+        channels = (color["r"], color["g"], color["b"])
+        if not all(type(c) is int and 0 <= c <= 255 for c in channels):
+            return None
+
+        tz = config["tz"]
+        brightness = config["brightness"]
+        if not self.is_exact_float(tz) or not self.is_exact_float(brightness):
+            return None
+
+        flags = 0
+        for key, flag in (("auto_dst", self.CONFIG_AUTO_DST), ("auto_brightness", self.CONFIG_AUTO_BRIGHTNESS), ("dither", self.CONFIG_DITHER)):
+            value = config.get(key, False)
+            if type(value) is not bool:
+                return None
+            if value:
+                flags |= flag
+        if "dither" in config:
+            flags |= self.CONFIG_HAS_DITHER
+        if type(tz) is int:
+            flags |= self.CONFIG_TZ_INT
+        if type(brightness) is int:
+            flags |= self.CONFIG_BRIGHTNESS_INT
+
+        strings = []
+        wifi_list = config["wifi"]
+        if type(wifi_list) is not list or len(wifi_list) > 255:
+            return None
+        for entry in wifi_list:
+            if type(entry) is not dict or len(entry) != 2 or "ssid" not in entry or "password" not in entry:
+                return None
+            strings.append(entry["ssid"])
+            strings.append(entry["password"])
+        if "upload_password" in config:
+            flags |= self.CONFIG_HAS_PASSWORD
+            strings.append(config["upload_password"])
+
+        payload = struct.pack(self.CONFIG_FORMAT, flags, channels[0], channels[1], channels[2], tz, brightness, len(wifi_list))
+        for string in strings:
+            if type(string) is not str:
+                return None
+            data = string.encode("utf-8")
+            if len(data) > 255:
+                return None
+            payload += bytes((len(data),)) + data
+        return payload
+
+    def unpack_config(self, view):
+        flags, r, g, b, tz, brightness, count = struct.unpack_from(self.CONFIG_FORMAT, view, 0)
+
+        strings = []
+        offset = self.CONFIG_SIZE
+        for _ in range(count * 2 + (1 if flags & self.CONFIG_HAS_PASSWORD else 0)):
+            length = view[offset]
+            strings.append(str(bytes(view[offset + 1:offset + 1 + length]), "utf-8"))
+            offset += 1 + length
+
+        # same key order as the defaults
+        config = {
+            "wifi": [{"ssid": strings[2 * i], "password": strings[2 * i + 1]} for i in range(count)],
+            "color": {"r": r, "g": g, "b": b},
+            "tz": int(tz) if flags & self.CONFIG_TZ_INT else tz,
+            "auto_dst": bool(flags & self.CONFIG_AUTO_DST),
+            "auto_brightness": bool(flags & self.CONFIG_AUTO_BRIGHTNESS),
+            "brightness": int(brightness) if flags & self.CONFIG_BRIGHTNESS_INT else brightness,
+        }
+        if flags & self.CONFIG_HAS_DITHER:
+            config["dither"] = bool(flags & self.CONFIG_DITHER)
+        if flags & self.CONFIG_HAS_PASSWORD:
+            config["upload_password"] = strings[-1]
+        return config
+
+    def is_exact_float(self, value):
+        if type(value) is not int and type(value) is not float:
+            return False
+        return struct.unpack("<f", struct.pack("<f", value))[0] == value
@@ -0,0 +1,86 @@
+import time
+
+
+class SubsystemFailure(RuntimeError):
+    pass
+
+
+class Subsystem:
+
+    def __init__(self, name, step, restart=None):
+        self.name = name
+        self.step = step
+        self.restart = restart
+
+        # times of the failures inside the failure window
+        self.failures = []
+        self.retry_at = 0
+        self.is_failed = False
+
+
+class SubsystemSupervisor:
+
+    def __init__(self, log=print, tracer=None):
+        self.log = log
+        self.tracer = tracer
+        self.subsystems = []
+
+        # first retry after 250ms, doubled on every further failure
+        self.backoff_base = 0.25
+        self.backoff_max = 30
+        # failures older than this are forgotten
+        self.failure_window = 60
+        # reset the whole board after this many failures inside the window
+        self.max_failures = 5
+
+    def add(self, name, step, restart=None):
+        self.subsystems.append(Subsystem(name, step, restart))
+
+    def loop(self):
+        for subsystem in self.subsystems:
+            self.run(subsystem)
+
+    def run(self, subsystem):
+        now = time.monotonic()
+
+        if subsystem.is_failed:
+            if now < subsystem.retry_at:
+                return
+            try:
+                if subsystem.restart:
+                    print(f"Restarting {subsystem.name}")
+                    subsystem.restart()
+                subsystem.is_failed = False
+            except Exception as e:
+                self.fail(subsystem, e)
+                return
+
+        # checked once, a step may switch tracing on or off
+        traced = self.tracer is not None and self.tracer.enabled
+        if traced:
+            self.tracer.record(subsystem.name, self.tracer.BEGIN)
+        try:
+            subsystem.step()
+        except Exception as e:
+            self.fail(subsystem, e)
+        finally:
+            if traced:
+                self.tracer.record(subsystem.name, self.tracer.END)
+
+    def fail(self, subsystem, e):
+        now = time.monotonic()
+
+        subsystem.failures = [t for t in subsystem.failures if now - t < self.failure_window]
+        subsystem.failures.append(now)
+        subsystem.is_failed = True
+        failures = len(subsystem.failures)
+
+        print(f"{subsystem.name} error: {e}")
+        self.log(f"{subsystem.name} error ({failures})")
+        self.log(e)
+
+        if failures >= self.max_failures:
+            raise SubsystemFailure(f"{subsystem.name} failed {failures} times within {self.failure_window}s")
+
+        backoff = min(self.backoff_base * (2 ** (failures - 1)), self.backoff_max)
+        subsystem.retry_at = now + backoff
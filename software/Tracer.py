@@ -0,0 +1,85 @@
+import time
+from array import array
+
+
+class Tracer:
+    """Records begin/end spans into a preallocated ring buffer.
+
+    The buffer is allocated up front and names are mapped to small ids once,
+    the only allocation per event is the long int from time.monotonic_ns().
+    With tracing disabled every call returns after checking the flag.
+    """
+
+    BEGIN = 0
+    END = 1
+
+    def __init__(self, size=512):
+        self.enabled = False
+        self.size = size
+        self.timestamps = array("q", [0] * size)
+        self.ids = bytearray(size)
+        self.kinds = bytearray(size)
+        self.index = 0
+        self.count = 0
+        self.names = []
+        self.name_ids = {}
+
+    def get_id(self, name):
+        name_id = self.name_ids.get(name)
+        if name_id is None:
+            if len(self.names) >= 256:
+                raise ValueError("too many span names")
+            name_id = len(self.names)
+            self.names.append(name)
+            self.name_ids[name] = name_id
+        return name_id
+
+    def record(self, name, kind):
+        i = self.index
+        self.timestamps[i] = time.monotonic_ns()
+        self.ids[i] = self.get_id(name)
+        self.kinds[i] = kind
+        self.index = (i + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def begin(self, name):
+        if self.enabled:
+            self.record(name, self.BEGIN)
+
+    def end(self, name):
+        if self.enabled:
+            self.record(name, self.END)
+
+    def span(self, name):
+        def decorator(function):
+            def traced(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                self.record(name, self.BEGIN)
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.record(name, self.END)
+            return traced
+        return decorator
+
+    def clear(self):
+        self.index = 0
+        self.count = 0
+
+    def chrome_trace(self):
+        """Yield the buffer as Chrome trace-event JSON, oldest event first."""
+        yield '{"traceEvents":['
+        start = (self.index - self.count) % self.size
+        for n in range(self.count):
+            i = (start + n) % self.size
+            separator = "," if n else ""
+            phase = "B" if self.kinds[i] == self.BEGIN else "E"
+            yield f'{separator}{{"name":"{self.names[self.ids[i]]}","ph":"{phase}","ts":{self.timestamps[i] // 1000},"pid":1,"tid":1}}\n'
+        yield '],"displayTimeUnit":"ms"}'
+
+    def dump(self, path):
+        with open(path, "w") as fp:
+            for chunk in self.chrome_trace():
+                fp.write(chunk)
@@ -4,6 +4,8 @@ import socketpool
 import microcontroller
 import json
 import os
+import hashlib
+import binascii
 
 import adafruit_ntp
 import rtc
@@ -11,8 +13,10 @@ from adafruit_datetime import datetime, timedelta
 
 import mdns
 import ipaddress
-from adafruit_httpserver import Server, Request, Response, FileResponse, GET, POST
-from adafruit_templateengine import render_template
+from adafruit_httpserver import Server, ServerStoppedError, Request, Response, FileResponse, ChunkedResponse, GET, POST, BAD_REQUEST_400, FORBIDDEN_403, Basic, require_authentication
+
+import pages
+from timezones import TIMEZONES
 
 import neopixel
 import board
@@ -21,6 +25,10 @@ from adafruit_pixel_framebuf import PixelFramebuffer
 
 import traceback
 
+from NvmStore import NvmStore
+from Tracer import Tracer
+from ColorPipeline import ColorPipeline
+
 class WordClock:
 
     def __init__(self):
@@ -29,25 +37,57 @@ class WordClock:
 
         self.AP_SSID = f"WordClock_{microcontroller.cpu.uid.hex()}"
         self.BASE_HOSTNAME = "wordclock"
+        self.MDNS_MAX_ATTEMPTS = 10
 
         self.pool = socketpool.SocketPool(wifi.radio)
 
+        # opt-in span tracing of the loop phases and routes
+        self.tracer = Tracer()
+        self.TRACE_FILE = "/trace.json"
+        # wrap the routes in spans, decided once when the routes are registered
+        self.TRACE_ROUTES = False
+
         # show light
         self.is_light_allowed = True
 
         self.last_time_sync = 0
         self.sync_interval = 60 * 60 * 4 # 4 hours
         self.is_time_synced = False # is the time synced more than one time?
+        self.time_offset = 0
+        self.last_sync_time = 0
+
+        # hot state is kept in nvm, config.json is only written on config changes
+        self.nvm_store = NvmStore(microcontroller.nvm)
+        self.ssid_index = -1
 
 
         self.disable_wifi_now = False
         self.wlan_off = True
 
         self.is_ap_started = False
-
-        self.config = {"wifi": [], "color": {"r": 255, "g": 0, "b": 0}, "tz": 1, "auto_dst": True, "auto_brightness": True, "brightness": 1.0}
+        self.mdns_server = None
+
+        # Wi-Fi link monitor
+        self.is_link_monitored = False
+        self.link_up_since = 0
+        self.link_down_since = 0
+        self.link_reconnects = 0
+        self.link_reconnect_time = 0
+        self.link_retry_at = 0
+        self.link_backoff = 1
+        self.link_backoff_max = 60 * 5
+        self.link_network_index = 0
+        self.link_connect_timeout = 5
+
+        self.config = {"wifi": [], "color": {"r": 255, "g": 0, "b": 0}, "tz": 1, "auto_dst": True, "auto_brightness": True, "brightness": 1.0, "dither": False}
         
+        # the strip stays at brightness 1, colors are scaled by the pipeline
         self.pixels = neopixel.NeoPixel(board.IO15, 117, brightness=1, auto_write=False)
+        self.color_pipeline = ColorPipeline()
+        self.update_color()
+        self.lit_pixels = []
+        self.dither_last = 0
+        self.dither_interval = 1000*1000*10
         self.pixels.fill((0, 0, 0))
         self.pixels.show()
         self.pixels_ignore = []
@@ -69,6 +109,12 @@ class WordClock:
         self.text_scroll_repeats = 2
         self.is_text_scroll = True
         self.is_client_connected = False
+
+        # uploads are sent in chunks of at most this size, hashing reuses one buffer
+        self.UPLOAD_CHUNK_SIZE = 1024
+        self.UPLOAD_DIRS = ("/www/public/",)
+        self.UPLOAD_ROOT_FILES = ("/config.json",)
+        self.upload_buffer = bytearray(self.UPLOAD_CHUNK_SIZE)
         
     def begin(self):
         # indicate clock is available and trying to connect..
@@ -78,9 +124,13 @@ class WordClock:
         self.pixels[116] = self.get_color()
         self.pixels.show()
 
+        # finish uploads interrupted between the two renames before the defaults are written
+        self.recover_uploads()
         if not 'config.json' in os.listdir():
             self.write_config()
         self.read_config()
+        self.load_state()
+        self.update_color()
         print(self.config)
         self.init_server()
         self.start_wifi()
@@ -89,86 +139,221 @@ class WordClock:
         self.pixels.fill((0, 0, 0))
         self.pixels.show()
 
-    def loop(self):
-        
+    def get_subsystems(self):
+        return [
+            ("display", self.loop_display, self.restart_display),
+            ("time_sync", self.loop_time_sync, None),
+            ("light_sensor", self.loop_light_sensor, self.restart_light_sensor),
+            ("wifi", self.loop_wifi, None),
+            ("server", self.loop_server, self.restart_server),
+        ]
+
+    def loop_display(self):
+
         if self.is_text_scroll:
             self.set_brightness(1)
             self.scroll_text(str(wifi.radio.ipv4_address) if not self.is_ap_started else str(wifi.radio.ipv4_address_ap))
+            return
 
-        now = time.localtime()
+        # show clock
+        if self.is_light_allowed:
+            now = time.localtime()
+
+            hours = now.tm_hour % 12
+            minutes = now.tm_min
 
+            if self.hours_buffer != hours or self.minutes_buffer != minutes:
+                self.display_time(hours, minutes)
+                self.hours_buffer = hours
+                self.minutes_buffer=minutes
+
+            if self.config.get("dither", False) and self.color_pipeline.is_dithering():
+                self.dither()
+        else:
+            self.disable_light()
+
+    def restart_display(self):
+        # force a full redraw from the RTC on the next step
+        self.hours_buffer = -1
+        self.minutes_buffer = -1
+        self.pixels.fill((0, 0, 0))
+        self.pixels.show()
+
+    def loop_time_sync(self):
         # Sync time
         if wifi.radio.connected and (self.last_time_sync + self.sync_interval < time.time()) and not self.is_ap_started:
             self.adjust_time()
 
-        # show clock
-        if not self.is_text_scroll:
-            if self.is_light_allowed:
-                
-                hours = now.tm_hour % 12
-                minutes = now.tm_min
-
-                if self.hours_buffer != hours or self.minutes_buffer != minutes:
-                    self.display_time(hours, minutes)
-                    self.hours_buffer = hours
-                    self.minutes_buffer=minutes
-                
-                if self.config["auto_brightness"]:
-                    self.adjust_brightness()
+    def loop_light_sensor(self):
+        if not self.is_text_scroll and self.is_light_allowed and self.config["auto_brightness"]:
+            self.adjust_brightness()
 
-            else:
-                self.disable_light()
+    def restart_light_sensor(self):
+        self.ldr_values = [0] * self.ldr_count
 
+    def loop_wifi(self):
         #Disable Wifi
         if self.disable_wifi_now:
             self.disable_wifi()
+            return
+
+        if self.is_link_monitored:
+            self.monitor_link()
+
+    def monitor_link(self):
+        now = time.monotonic()
+
+        if wifi.radio.connected:
+            # the radio reconnected on its own
+            if self.link_down_since:
+                self.restore_link("saved network", None)
+            return
+
+        # link just went down, start reconnecting on the next step
+        if not self.link_down_since:
+            print("Wi-Fi link lost")
+            self.writeLog("Wi-Fi link lost")
+            self.link_down_since = now
+            self.link_up_since = 0
+            self.link_backoff = 1
+            self.link_network_index = 0
+            self.link_retry_at = now
+            return
+
+        if now < self.link_retry_at:
+            return
+
+        credentials = self.config.get("wifi", [])
+        if not credentials:
+            return
 
+        # try only one network per step, radio.connect() blocks until timeout
+        index = self.link_network_index % len(credentials)
+        entry = credentials[index]
+        ssid = entry["ssid"]
+        print(f"Trying to reconnect to {ssid}...")
+        try:
+            wifi.radio.connect(ssid, entry["password"], timeout=self.link_connect_timeout)
+        except Exception as e:
+            print(f"Failed to reconnect to {ssid}: {e}")
+            self.link_network_index += 1
+            # wait before the next round through all saved networks
+            if self.link_network_index % len(credentials) == 0:
+                self.link_retry_at = time.monotonic() + self.link_backoff
+                self.link_backoff = min(self.link_backoff * 2, self.link_backoff_max)
+            return
+
+        self.restore_link(ssid, index)
+
+    def restore_link(self, ssid, index):
+        self.link_reconnects += 1
+        self.link_reconnect_time = time.monotonic() - self.link_down_since
+        self.link_down_since = 0
+        self.link_up_since = time.monotonic()
+        if index is not None:
+            self.ssid_index = index
+            self.save_state()
+        print(f"Reconnected to {ssid} after {self.link_reconnect_time:.1f}s. IP:", wifi.radio.ipv4_address)
+        self.writeLog(f"Reconnected to {ssid} after {self.link_reconnect_time:.1f}s ({self.link_reconnects} reconnects)")
+
+        self.restart_server()
+        self.register_mdns()
+
+    def get_link_uptime(self):
+        if not self.link_up_since:
+            return 0
+        return time.monotonic() - self.link_up_since
+
+    def loop_server(self):
         # Poll Server
-        if wifi.radio.enabled:
+        if wifi.radio.enabled and (self.is_ap_started or wifi.radio.connected):
             try:
                 if self.is_ap_started:
                     self.ap_server.poll()
                 else:
                     self.server.poll()
+            except ServerStoppedError:
+                # the server socket is gone, let the supervisor restart it
+                raise
             except Exception as e:
+                # errors of a single request must not count towards a reset
                 print(f"Server error: {e}")
                 self.writeLog("Server error")
                 self.writeLog(e)
 
+    def restart_server(self):
+        if not wifi.radio.enabled or not (self.is_ap_started or wifi.radio.connected):
+            return
+        if self.is_ap_started:
+            self.ap_server.stop()
+            self.ap_server.start(str(wifi.radio.ipv4_address_ap), 80)
+        else:
+            self.server.stop()
+            self.server.start(str(wifi.radio.ipv4_address), 80)
+
+    def get_config_stamp(self):
+        stat = os.stat(self.CREDENTIALS_FILE)
+        return (stat[6], stat[8])
+
     def read_config(self):
         try:
+            stamp = self.get_config_stamp()
+            config = self.nvm_store.read_config(stamp)
+            if config:
+                self.config = config
+                return
+
             with open(self.CREDENTIALS_FILE, "r") as fp:
                 self.config = json.load(fp)
+            self.nvm_store.write_config(self.config, stamp)
         except OSError as e:
             print("Error when reading file")
             pass
+        except ValueError as e:
+            print("Error when reading config")
+            pass
 
     def write_config(self):
         try:
             with open(self.CREDENTIALS_FILE, "w") as fp:
                 json.dump(self.config, fp)
+            self.nvm_store.write_config(self.config, self.get_config_stamp())
         except OSError as e:
             print("Error when writing file")
             pass
 
+    def load_state(self):
+        state = self.nvm_store.read_state()
+        if not state:
+            return
+        print(state)
+        self.is_light_allowed = state["is_light_allowed"]
+        self.ssid_index = state["ssid_index"]
+        self.time_offset = state["tz_offset"]
+        self.last_sync_time = state["last_sync"]
+
+    def save_state(self):
+        self.nvm_store.write_state(self.is_light_allowed, self.ssid_index, self.time_offset, self.last_sync_time)
+
     def register_mdns(self):
+        if self.mdns_server:
+            self.mdns_server.deinit()
         self.mdns_server = mdns.Server(wifi.radio)
 
-        hostname = self.BASE_HOSTNAME
-        number = 0
-
-        while True:
+        # limited, advertising fails for every name while the link is down
+        for number in range(self.MDNS_MAX_ATTEMPTS):
+            hostname = f"{self.BASE_HOSTNAME}{number}" if number else self.BASE_HOSTNAME
             try:
                 self.mdns_server.hostname = hostname
                 self.mdns_server.advertise_service(service_type="_http", protocol="_tcp", port=80)
                 print(f"Registered mDNS: {hostname}.local")
-                break
+                return hostname
             except OSError:
-                number += 1
-                hostname = f"{self.BASE_HOSTNAME}{number}"
                 print(f"Hostname {hostname}.local is taken, trying next...")
 
-        return hostname
+        print("Could not register mDNS")
+        self.writeLog("Could not register mDNS")
+        return None
 
     def save_credentials(self, ssid, password):
         wifi_list = self.config.get("wifi", [])
@@ -186,13 +371,20 @@ class WordClock:
             print("No saved Wi-Fi credentials found.")
             return False
 
-        for entry in credentials:
+        # start with the network that worked last time
+        first = self.ssid_index if 0 <= self.ssid_index < len(credentials) else 0
+
+        for i in range(len(credentials)):
+            index = (first + i) % len(credentials)
+            entry = credentials[index]
             ssid = entry["ssid"]
             password = entry["password"]
             print(f"Trying to connect to {ssid}...")
             try:
                 wifi.radio.connect(ssid, password, timeout=30)
                 print(f"Connected to {ssid}!")
+                self.ssid_index = index
+                self.save_state()
                 return True
             except Exception as e:
                 print(f"Failed to connect to {ssid}: {e}")
@@ -230,6 +422,10 @@ class WordClock:
             # Abort scrolling
             if not self.is_ap_started and self.text_scroll_repeat >= self.text_scroll_repeats:
                 self.is_text_scroll = False
+                # redraw the clock face over the text
+                self.hours_buffer = -1
+                if not self.config["auto_brightness"]:
+                    self.set_brightness(self.config["brightness"])
 
     def disable_light(self, show = True):
         if len(self.pixels_ignore) > 0:
@@ -283,9 +479,16 @@ class WordClock:
                 print("daylight saving time")
                 offset = offset + 1
             print("try to sync time")
-            ntp = adafruit_ntp.NTP(self.pool, tz_offset=offset)
-            rtc.RTC().datetime = ntp.datetime
+            self.tracer.begin("ntp")
+            try:
+                ntp = adafruit_ntp.NTP(self.pool, tz_offset=offset)
+                rtc.RTC().datetime = ntp.datetime
+            finally:
+                self.tracer.end("ntp")
             print(time.localtime())
+            self.time_offset = offset
+            self.last_sync_time = time.time()
+            self.save_state()
 
             # Only store last timestamp if one successfully sync (to retrigger a sync after first boot)
             if self.is_time_synced:
@@ -307,6 +510,8 @@ class WordClock:
         if self.connect_to_wifi():
             print("Wi-Fi connected. IP:", wifi.radio.ipv4_address)
             self.server.start(str(wifi.radio.ipv4_address), 80)
+            self.is_link_monitored = True
+            self.link_up_since = time.monotonic()
             print(f"Connect to WiFi, visit http://{wifi.radio.ipv4_address} to configure everything.")
         else:
             self.start_access_point()
@@ -320,6 +525,7 @@ class WordClock:
     def disable_wifi(self):
         print("disable wifi")
         self.disable_wifi_now = False
+        self.is_link_monitored = False
         self.server.stop()
         wifi.radio.enabled = False
 
@@ -353,11 +559,39 @@ class WordClock:
         self.set_brightness(brightness)
     
     def set_brightness(self, brightness):
-        self.pixels.brightness = brightness
-        self.pixels.show()    
+        # only repaint when the level really changed
+        if not self.color_pipeline.set_brightness(brightness):
+            return
+        if self.is_text_scroll or not self.is_light_allowed:
+            return
+
+        color = self.get_color()
+        for i in self.lit_pixels:
+            self.pixels[i] = color
+        self.show()
+
+    def dither(self):
+        if time.monotonic_ns() - self.dither_last < self.dither_interval:
+            return
+        self.dither_last = time.monotonic_ns()
+
+        self.color_pipeline.next_frame()
+        for i in self.lit_pixels:
+            self.pixels[i] = self.color_pipeline.get_dithered(i)
+        self.show()
+
+    def show(self):
+        self.tracer.begin("show")
+        try:
+            self.pixels.show()
+        finally:
+            self.tracer.end("show")
+
+    def update_color(self):
+        self.color_pipeline.set_color((int(self.config['color']['r']), int(self.config['color']['g']), int(self.config['color']['b'])))
     
     def get_color(self):
-        return (int(self.config['color']['r']), int(self.config['color']['g']), int(self.config['color']['b']))
+        return self.color_pipeline.base
 
     def get_pixels(self):
         return self.pixels
@@ -366,7 +600,13 @@ class WordClock:
         self.pixels_ignore = pixels_ignore
 
     def display_time(self, hours, minutes):
-        
+        self.tracer.begin("display_time")
+        try:
+            self.draw_time(hours, minutes)
+        finally:
+            self.tracer.end("display_time")
+
+    def draw_time(self, hours, minutes):
         # alles resetten
         self.disable_light(True)
         
@@ -665,8 +905,15 @@ class WordClock:
             self.pixels[101] = self.get_color()
             self.pixels[100] = self.get_color()
             self.pixels[99] = self.get_color()
+
+        # remember the lit pixels to rescale or dither them without a redraw
+        color = self.get_color()
+        if color != (0, 0, 0):
+            self.lit_pixels = [i for i in range(len(self.pixels)) if i not in self.pixels_ignore and self.pixels[i] == color]
+        else:
+            self.lit_pixels = []
      
-        self.pixels.show()
+        self.show()
 
     def writeLog(self, message):
         try:
@@ -680,27 +927,167 @@ class WordClock:
             print("Error when writing file")
             pass
 
+    def get_upload_path(self, path):
+        if not path or ".." in path or "\\" in path:
+            return None
+        if not path.startswith("/"):
+            path = "/" + path
+        if path in self.UPLOAD_ROOT_FILES:
+            return path
+        # .tmp and .bak are used while swapping files
+        if path.endswith(".tmp") or path.endswith(".bak"):
+            return None
+        for directory in self.UPLOAD_DIRS:
+            name = path[len(directory):]
+            if path.startswith(directory) and name and "/" not in name:
+                return path
+        return None
+
+    def recover_uploads(self):
+        try:
+            paths = list(self.UPLOAD_ROOT_FILES)
+            for directory in self.UPLOAD_DIRS:
+                paths += [directory + name[:-4] for name in os.listdir(directory.rstrip("/")) if name.endswith(".bak")]
+
+            for path in paths:
+                bak_path = path + ".bak"
+                try:
+                    os.stat(bak_path)
+                except OSError:
+                    continue
+                try:
+                    os.stat(path)
+                    exists = True
+                except OSError:
+                    exists = False
+
+                if exists:
+                    # the new file is in place, only the backup was left over
+                    os.remove(bak_path)
+                else:
+                    print(f"Restoring {path} from backup")
+                    os.rename(bak_path, path)
+        except OSError as e:  # Typically when the filesystem isn't writeable...
+            print("Error when recovering uploads")
+            self.writeLog("Error when recovering uploads")
+            self.writeLog(e)
+
+    def is_upload_allowed(self, request):
+        password = self.config.get("upload_password", "")
+        if not password:
+            return False
+        # raises AuthenticationError, answered with 401 by the server
+        require_authentication(request, [Basic("admin", password)])
+        return True
+
+    def write_upload_chunk(self, path, offset, data):
+        tmp_path = path + ".tmp"
+        if offset == 0:
+            mode = "wb"
+        else:
+            try:
+                size = os.stat(tmp_path)[6]
+            except OSError:
+                return False
+            if size != offset:
+                return False
+            mode = "ab"
+
+        with open(tmp_path, mode) as fp:
+            fp.write(data)
+        return True
+
+    def get_file_sha256(self, path):
+        sha = hashlib.new("sha256")
+        view = memoryview(self.upload_buffer)
+        with open(path, "rb") as fp:
+            while True:
+                count = fp.readinto(self.upload_buffer)
+                if not count:
+                    break
+                sha.update(view[:count])
+        return binascii.hexlify(sha.digest()).decode()
+
+    def is_valid_config(self, path):
+        try:
+            with open(path, "r") as fp:
+                config = json.load(fp)
+        except ValueError:
+            return False
+        # keys the clock reads without a default
+        if not isinstance(config, dict) or not isinstance(config.get("color"), dict):
+            return False
+        if not all(key in config["color"] for key in ("r", "g", "b")):
+            return False
+        return all(key in config for key in ("tz", "auto_dst", "auto_brightness", "brightness"))
+
+    def commit_upload(self, path, sha256):
+        tmp_path = path + ".tmp"
+        if self.get_file_sha256(tmp_path) != sha256.lower():
+            os.remove(tmp_path)
+            return "Checksum mismatch"
+
+        if path == "/" + self.CREDENTIALS_FILE and not self.is_valid_config(tmp_path):
+            os.remove(tmp_path)
+            return "Invalid config"
+
+        # FAT can not rename onto an existing file, keep a backup until the new one is in place
+        bak_path = path + ".bak"
+        has_backup = False
+        try:
+            os.rename(path, bak_path)
+            has_backup = True
+        except OSError:
+            pass
+
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            if has_backup:
+                os.rename(bak_path, path)
+            raise
+
+        if has_backup:
+            os.remove(bak_path)
+
+        self.invalidate_caches(path)
+        return None
+
+    def invalidate_caches(self, path):
+        if path == "/config.json":
+            self.read_config()
+            self.update_color()
+            if not self.config["auto_brightness"]:
+                self.set_brightness(self.config["brightness"])
+            self.hours_buffer = -1
+            self.minutes_buffer = -1
+
     def init_server(self):
         self.ap_server = Server(self.pool, "/www/public")
         self.server = Server(self.pool, "/www/public")
 
+        if self.TRACE_ROUTES:
+            span = self.tracer.span
+        else:
+            span = lambda name: lambda function: function
+
         @self.ap_server.route("/", GET)
+        @span("ap http /")
         def homepage(request: Request):
             self.is_client_connected = True
             networks = wifi.radio.start_scanning_networks()
             ssid_list = [net.ssid for net in networks]
             wifi.radio.stop_scanning_networks()
 
-            return Response(
+            context = {"ssid_list": ssid_list}
+            return ChunkedResponse(
                 request,
-                render_template(
-                    "www/templates/wifi.tpl.html",
-                    context={"ssid_list": ssid_list},
-                ),
+                lambda: pages.chunked(pages.render_wifi(context)),
                 content_type="text/html"
             )
 
         @self.ap_server.route("/connect", POST)
+        @span("ap http /connect")
         def connect(request: Request):
             data = request.json()
             ssid = data.get("ssid")
@@ -711,18 +1098,43 @@ class WordClock:
             microcontroller.reset()
 
         @self.server.route("/", GET)
+        @span("http /")
         def homepage2(request: Request):
 
-            return Response(
+            context = {"id": microcontroller.cpu.uid.hex(), "config": self.config, "color": f"#{self.config['color']['r']:02x}{self.config['color']['g']:02x}{self.config['color']['b']:02x}", "timezones": TIMEZONES}
+            return ChunkedResponse(
                 request,
-                render_template(
-                    "www/templates/index.tpl.html",
-                    context={"id": microcontroller.cpu.uid.hex(), "config": self.config, "color": f"#{self.config['color']['r']:02x}{self.config['color']['g']:02x}{self.config['color']['b']:02x}"},
-                ),
+                lambda: pages.chunked(pages.render_index(context)),
                 content_type="text/html",
             )
 
+        @self.server.route("/status", GET)
+        @span("http /status")
+        def status(request: Request):
+            config = {key: value for key, value in self.config.items() if key not in ("wifi", "upload_password")}
+            return Response(
+                request,
+                body=json.dumps({
+                    "id": microcontroller.cpu.uid.hex(),
+                    "config": config,
+                    "light": self.is_light_allowed,
+                    "brightness": self.color_pipeline.brightness,
+                    "time": time.time(),
+                    "link_uptime": self.get_link_uptime(),
+                    "link_reconnects": self.link_reconnects,
+                    "last_sync": self.last_sync_time,
+                    "tz_offset": self.time_offset,
+                }),
+                content_type="application/json",
+            )
+
+        @self.server.route("/trace", GET)
+        @span("http /trace")
+        def trace(request: Request):
+            return ChunkedResponse(request, self.tracer.chrome_trace, content_type="application/json")
+
         @self.server.route("/controlColor", POST)
+        @span("http /controlColor")
         def controlColor(request: Request):
             data = request.json()
             r, g, b = data.get("r", 0), data.get("g", 0), data.get("b", 0)
@@ -730,11 +1142,13 @@ class WordClock:
             self.config['color']['g'] = int(g)
             self.config['color']['b'] = int(b)
             self.write_config()
+            self.update_color()
             self.display_time(self.hours_buffer, self.minutes_buffer)
             print(f"Set color saved: {r}, {g}, {b}")
             return Response(request, body='{"msg": "Color set"}')
 
         @self.server.route("/setTimeZone", POST)
+        @span("http /setTimeZone")
         def setTimeZone(request: Request):
             data = request.json()
             
@@ -750,6 +1164,7 @@ class WordClock:
             return Response(request, body='{"msg": "Timezone set"}')
 
         @self.server.route("/setBrightness", POST)
+        @span("http /setBrightness")
         def setTimeZone(request: Request):
             data = request.json()
             
@@ -758,22 +1173,36 @@ class WordClock:
             
             brightness = data.get("brightness", 100)
             self.config['brightness'] = int(brightness)/100.0
+
+            dither = data.get("dither", self.config.get("dither", False))
+            self.config['dither'] = bool(dither)
             
             self.write_config()
             self.set_brightness(self.config['brightness'])
+            self.save_state()
             print(f"Set brightness: {brightness}")
             return Response(request, body='{"msg": "Brightness set"}')
 
         @self.server.route("/control/<action>", append_slash=True)
+        @span("http /control/<action>")
         def control(request: Request, action: str):
             if action == "light_on":
                 self.is_light_allowed = True
+                self.save_state()
                 self.display_time(self.hours_buffer, self.minutes_buffer)
             elif action == "light_off":
                 self.is_light_allowed = False
+                self.save_state()
                 self.disable_light()
             elif action == "disable_wifi":
                 self.disable_wifi_now = True
+            elif action == "trace_on":
+                self.tracer.clear()
+                self.tracer.enabled = True
+            elif action == "trace_off":
+                self.tracer.enabled = False
+            elif action == "trace_dump":
+                self.tracer.dump(self.TRACE_FILE)
             elif action == "tz_summer":
                 self.config['tz'] = 2
                 self.write_config()
@@ -787,4 +1216,50 @@ class WordClock:
 
             return Response(
                 request, f"Action ({action}) performed"
-            )
\ No newline at end of file
+            )
+
+        @self.server.route("/upload", POST)
+        @span("http /upload")
+        def upload(request: Request):
+            if not self.is_upload_allowed(request):
+                return Response(request, body='{"msg": "Upload disabled"}', status=FORBIDDEN_403)
+
+            path = self.get_upload_path(request.query_params.get("path"))
+            if not path:
+                return Response(request, body='{"msg": "Invalid path"}', status=BAD_REQUEST_400)
+
+            data = request.body
+            if len(data) > self.UPLOAD_CHUNK_SIZE:
+                return Response(request, body='{"msg": "Chunk too large"}', status=BAD_REQUEST_400)
+
+            try:
+                offset = int(request.query_params.get("offset", 0))
+            except ValueError:
+                return Response(request, body='{"msg": "Invalid offset"}', status=BAD_REQUEST_400)
+            if not self.write_upload_chunk(path, offset, data):
+                return Response(request, body='{"msg": "Unexpected offset"}', status=BAD_REQUEST_400)
+
+            return Response(request, body=f'{{"msg": "Chunk received", "offset": {offset + len(data)}}}')
+
+        @self.server.route("/upload/commit", POST)
+        @span("http /upload/commit")
+        def upload_commit(request: Request):
+            if not self.is_upload_allowed(request):
+                return Response(request, body='{"msg": "Upload disabled"}', status=FORBIDDEN_403)
+
+            path = self.get_upload_path(request.query_params.get("path"))
+            sha256 = request.query_params.get("sha256")
+            if not path or not sha256:
+                return Response(request, body='{"msg": "Invalid path"}', status=BAD_REQUEST_400)
+
+            try:
+                error = self.commit_upload(path, sha256)
+                if error:
+                    return Response(request, body=f'{{"msg": "{error}"}}', status=BAD_REQUEST_400)
+            except OSError as e:
+                self.writeLog(f"Upload of {path} failed")
+                self.writeLog(e)
+                return Response(request, body='{"msg": "Upload failed"}', status=BAD_REQUEST_400)
+
+            print(f"Uploaded {path}")
+            return Response(request, body='{"msg": "Upload saved"}')
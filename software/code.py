@@ -1,4 +1,5 @@
 from WordClock import WordClock
+from SubsystemSupervisor import SubsystemSupervisor
 import microcontroller
 import time
 import wifi
@@ -22,8 +23,13 @@ try:
     wordclock = WordClock()
     wordclock.begin()
 
+    # restart only the failing part, reset the board after repeated failures
+    supervisor = SubsystemSupervisor(writeLog, wordclock.tracer)
+    for name, step, restart in wordclock.get_subsystems():
+        supervisor.add(name, step, restart)
+
     while True:
-        wordclock.loop()
+        supervisor.loop()
 
 except Exception as e:
     #print(e)
@@ -0,0 +1,64 @@
+# Generated by tools/compile_templates.py from www/templates, do not edit.
+
+
+def escape(value):
+    value = str(value)
+    for char, entity in (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;"), ("'", "&#x27;")):
+        if char in value:
+            value = value.replace(char, entity)
+    return value
+
+
+def chunked(parts, size=512):
+    """Join the pieces of a page into chunks of about size characters."""
+    buffer = []
+    length = 0
+    for part in parts:
+        buffer.append(part)
+        length += len(part)
+        if length >= size:
+            yield "".join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def render_index(context):
+    yield '<!DOCTYPE html>\n<html lang="en">\n\n<head>\n    <meta charset="utf-8">\n    <meta name="robots" content="noindex,nofollow">\n    <meta http-equiv="Content-Type" content="text/html; charset=UTF-8" />\n    <title>WordClock Controller</title>\n    <meta name="viewport" content="width=device-width, initial-scale=1.0, user-scalable=no">\n    <meta name="apple-mobile-web-app-capable" content="yes">\n\n    <link rel="apple-touch-icon" sizes="180x180" href="./apple-touch-icon.png">\n    <link rel="icon" type="image/png" sizes="32x32" href="./favicon-32x32.png">\n    <link rel="icon" type="image/png" sizes="16x16" href="./favicon-16x16.png">\n    <link rel="manifest" href="./site.webmanifest">\n    <link rel="shortcut icon" href="./favicon.ico">\n    <meta name="theme-color" content="#000000" />\n\n    <link rel="stylesheet" href="style.css?v=20250226">\n    <script defer src="./main.js?v=20250226"></script>\n</head>\n\n<body>\n    <header>\n        <div class="container">\n            <h1>WordClock '
+    yield escape(context.get("id"))
+    yield '</h1>\n        </div>\n    </header>\n\n    <section>\n        <div class="container select-color">\n            <h2>Farbe</h2>\n            <input type="color" class="color" name="color" value="'
+    yield escape(context.get("color"))
+    yield '" />\n            <button type="button" class="primary sendColor">Speichern</button>\n        </div>\n        \n        <div class="container brightness">\n            <h2>Helligkeit</h2>\n\n            <label class="checkbox" for="checkboxAutoBrightness">\n                <input name="auto_brightness" type="checkbox" value="1" id="checkboxAutoBrightness" '
+    if context.get("config")["auto_brightness"]:
+        yield 'checked'
+    yield '>\n                Automatische Helligkeitseinstellung\n            </label>\n            <input type="range" min="0" max="100" value="'
+    yield escape(int(context.get("config")["brightness"]*100))
+    yield '" name="brightness">\n            <label class="checkbox" for="checkboxDither">\n                <input name="dither" type="checkbox" value="1" id="checkboxDither" '
+    if context.get("config").get("dither", False):
+        yield 'checked'
+    yield '>\n                Dithering bei geringer Helligkeit\n            </label>\n\n            <button type="button" class="primary sendBrightness">Speichern</button>\n        </div>\n\n        <div class="container time">\n            <h2>Uhrzeit</h2>\n            <div>\n                <label class="full" for="timezone">Zeitzone:</label>\n                <select name="timezone">\n                    '
+    for tz, label in context.get("timezones"):
+        yield '\n                    <option value="'
+        yield escape(tz)
+        yield '" '
+        if context.get("config")["tz"] == tz:
+            yield 'selected'
+        yield '>'
+        yield escape(label)
+        yield '</option>\n                    '
+    yield '\n                </select>\n            </div>\n            <div>\n                <label class="checkbox" for="checkboxAutoDST">\n                    <input name="auto_dst" type="checkbox" value="1" id="checkboxAutoDST" '
+    if context.get("config")["auto_dst"]:
+        yield 'checked'
+    yield '>\n                    Automatische Zeitumstellung\n                </label>\n            </div>\n            <button type="button" class="primary sendTimezone">Speichern</button>\n        </div>\n\n    </section>\n\n</body>\n\n</html>'
+
+
+def render_wifi(context):
+    yield '<!DOCTYPE html>\n<html lang="en">\n\n<head>\n    <meta charset="utf-8">\n    <meta name="robots" content="noindex,nofollow">\n    <meta http-equiv="Content-Type" content="text/html; charset=UTF-8" />\n    <title>WordClock Controller</title>\n    <meta name="viewport" content="width=device-width, initial-scale=1.0, user-scalable=no">\n    <meta name="apple-mobile-web-app-capable" content="yes">\n\n    <link rel="apple-touch-icon" sizes="180x180" href="./apple-touch-icon.png">\n    <link rel="icon" type="image/png" sizes="32x32" href="./favicon-32x32.png">\n    <link rel="icon" type="image/png" sizes="16x16" href="./favicon-16x16.png">\n    <link rel="manifest" href="./site.webmanifest">\n    <link rel="shortcut icon" href="./favicon.ico">\n    <meta name="theme-color" content="#000000" />\n\n    <link rel="stylesheet" href="style.css?v=20250226">\n    <script defer src="./main.js?v=20250226"></script>\n</head>\n\n<body>\n    <header>\n        <div class="container">\n            <h1>WordClock</h1>\n            <h2>Wi-Fi Setup</h2>\n        </div>\n    </header>\n\n    <section>\n        <div class="container settings">\n            <h2>Settings</h2>\n            <div>\n                <label class="full" for="ssid">Wi-Fi:</label>\n                <select name="ssid">\n                    '
+    for ssid in context.get("ssid_list"):
+        yield '\n                    <option value="'
+        yield str(ssid)
+        yield '">'
+        yield escape(ssid)
+        yield '</option>\n                    '
+    yield '\n                </select>\n            </div>\n            <div>\n                <label class="full" for="password">Password:</label>\n                <input type="password" name="password">\n            </div>\n            <button type="button" class="primary connect">Connect</button>\n        </div>\n    </section>\n\n</body>\n\n</html>'
@@ -40,7 +40,8 @@ if(sendBrightnessButton){
       e.preventDefault();
       let auto_brightness = document.querySelector('input[name="auto_brightness"]').checked;
       let brightness = document.querySelector('input[name="brightness"]').value;
-      await makeRequest("setBrightness", {"auto_brightness": auto_brightness, "brightness": brightness});
+      let dither = document.querySelector('input[name="dither"]').checked;
+      await makeRequest("setBrightness", {"auto_brightness": auto_brightness, "brightness": brightness, "dither": dither});
   });
 }
 
@@ -0,0 +1,146 @@
+"""Compile the page templates into a Python module of generator functions.
+
+    python compile_templates.py [--mpy]
+
+Every software/www/templates/<name>.tpl.html becomes a function
+render_<name>(context) in software/pages.py which yields the page piece by
+piece, so the clock does not parse templates or build whole pages at request
+time. With --mpy the module is also compiled with mpy-cross.
+
+Only the template syntax used by the pages is supported: {{ expr }},
+{% if %}/{% elif %}/{% else %}/{% endif %}, {% for %}/{% endfor %},
+{% autoescape off %}/{% endautoescape %} and {# comments #}.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "software"))
+TEMPLATES_DIR = os.path.join(ROOT, "www", "templates")
+OUTPUT_FILE = os.path.join(ROOT, "pages.py")
+
+TOKEN = re.compile(r"({{.*?}}|{%.*?%}|{#.*?#})", re.DOTALL)
+
+HEADER = '''# Generated by tools/compile_templates.py from www/templates, do not edit.
+
+
+def escape(value):
+    value = str(value)
+    for char, entity in (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;"), ("'", "&#x27;")):
+        if char in value:
+            value = value.replace(char, entity)
+    return value
+
+
+def chunked(parts, size=512):
+    """Join the pieces of a page into chunks of about size characters."""
+    buffer = []
+    length = 0
+    for part in parts:
+        buffer.append(part)
+        length += len(part)
+        if length >= size:
+            yield "".join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield "".join(buffer)
+'''
+
+
+class TemplateSyntaxError(Exception):
+    pass
+
+
+def compile_template(name, source):
+    lines = [f"def render_{name}(context):"]
+    indent = 1
+    blocks = []
+    autoescape = [True]
+    text = []
+
+    def flush():
+        if text:
+            lines.append("    " * indent + f"yield {''.join(text)!r}")
+            text.clear()
+
+    for token in TOKEN.split(source):
+        if not token:
+            continue
+        if token.startswith("{#"):
+            continue
+        if token.startswith("{{"):
+            flush()
+            expression = token[2:-2].strip()
+            if autoescape[-1]:
+                lines.append("    " * indent + f"yield escape({expression})")
+            else:
+                lines.append("    " * indent + f"yield str({expression})")
+            continue
+        if not token.startswith("{%"):
+            text.append(token)
+            continue
+
+        flush()
+        statement = token[2:-2].strip()
+        keyword = statement.split(" ", 1)[0]
+
+        # keep empty blocks valid python
+        if keyword in ("elif", "else", "endif", "endfor") and lines[-1].endswith(":"):
+            lines.append("    " * indent + "pass")
+
+        if keyword in ("if", "for"):
+            lines.append("    " * indent + f"{statement}:")
+            blocks.append(keyword)
+            indent += 1
+        elif keyword in ("elif", "else"):
+            if not blocks or blocks[-1] != "if":
+                raise TemplateSyntaxError(f"{name}: unexpected {statement}")
+            lines.append("    " * (indent - 1) + f"{statement}:")
+        elif keyword in ("endif", "endfor"):
+            if not blocks or blocks.pop() != keyword[3:]:
+                raise TemplateSyntaxError(f"{name}: unexpected {statement}")
+            indent -= 1
+        elif statement in ("autoescape off", "autoescape on"):
+            autoescape.append(statement == "autoescape on")
+        elif statement == "endautoescape":
+            autoescape.pop()
+        else:
+            raise TemplateSyntaxError(f"{name}: unsupported tag {token}")
+
+    flush()
+    if blocks:
+        raise TemplateSyntaxError(f"{name}: missing end{blocks[-1]}")
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile page templates into software/pages.py")
+    parser.add_argument("--mpy", action="store_true", help="also build pages.mpy with mpy-cross")
+    args = parser.parse_args(argv)
+
+    functions = []
+    for filename in sorted(os.listdir(TEMPLATES_DIR)):
+        if not filename.endswith(".tpl.html"):
+            continue
+        with open(os.path.join(TEMPLATES_DIR, filename), encoding="utf-8") as fp:
+            functions.append(compile_template(filename[:-len(".tpl.html")], fp.read()))
+
+    with open(OUTPUT_FILE, "w", encoding="utf-8") as fp:
+        fp.write(HEADER)
+        for function in functions:
+            fp.write("\n\n" + function + "\n")
+    print(f"Wrote {OUTPUT_FILE}")
+
+    if args.mpy:
+        subprocess.run(["mpy-cross", OUTPUT_FILE], check=True)
+        print(f"Wrote {OUTPUT_FILE[:-3]}.mpy")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""Discover WordClocks on the network and configure all of them at once.
+
+    python fleet.py status
+    python fleet.py color "#ff8800"
+    python fleet.py brightness 40
+    python fleet.py brightness auto
+    python fleet.py timezone 1 --no-auto-dst
+    python fleet.py control light_off
+
+Clocks are found via mDNS (_http._tcp, hostnames starting with "wordclock").
+Use --host (repeatable, host or host:port) to skip discovery, e.g. for
+the local stand-in clocks of standin.py.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+import aiohttp
+
+SERVICE_TYPE = "_http._tcp.local."
+BASE_HOSTNAME = "wordclock"
+
+
+async def discover(timeout):
+    from zeroconf import ServiceStateChange
+    from zeroconf.asyncio import AsyncServiceBrowser, AsyncServiceInfo, AsyncZeroconf
+
+    names = set()
+
+    def on_change(zeroconf, service_type, name, state_change):
+        if state_change is ServiceStateChange.Added:
+            names.add(name)
+
+    aiozc = AsyncZeroconf()
+    browser = AsyncServiceBrowser(aiozc.zeroconf, [SERVICE_TYPE], handlers=[on_change])
+    await asyncio.sleep(timeout)
+    await browser.async_cancel()
+
+    hosts = []
+    for name in sorted(names):
+        info = AsyncServiceInfo(SERVICE_TYPE, name)
+        if not await info.async_request(aiozc.zeroconf, 3000):
+            continue
+        if not (info.server or "").startswith(BASE_HOSTNAME):
+            continue
+        addresses = info.parsed_addresses()
+        if addresses:
+            hosts.append(f"{addresses[0]}:{info.port}")
+
+    await aiozc.async_close()
+    return hosts
+
+
+def parse_color(value):
+    color = value.lstrip("#")
+    if len(color) != 6:
+        raise argparse.ArgumentTypeError(f"invalid color {value!r}, expected #rrggbb")
+    try:
+        return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid color {value!r}, expected #rrggbb")
+
+
+def parse_level(value):
+    if value == "auto":
+        return value
+    try:
+        level = int(value)
+    except ValueError:
+        level = -1
+    if not 0 <= level <= 100:
+        raise argparse.ArgumentTypeError(f"invalid brightness {value!r}, expected 0-100 or 'auto'")
+    return level
+
+
+def get_requests(args):
+    """Translate the command line into (method, path, json) calls on the clock.
+
+    json may be a function, it then gets the response of the previous call.
+    """
+    if args.command == "status":
+        return [("GET", "/status", None)]
+    if args.command == "color":
+        r, g, b = args.color
+        return [("POST", "/controlColor", {"r": r, "g": g, "b": b})]
+    if args.command == "brightness":
+        if args.level == "auto":
+            # keep the saved manual level of every clock
+            return [
+                ("GET", "/status", None),
+                ("POST", "/setBrightness", lambda status: {"auto_brightness": True, "brightness": round(json.loads(status)["config"]["brightness"] * 100)}),
+            ]
+        return [("POST", "/setBrightness", {"auto_brightness": False, "brightness": args.level})]
+    if args.command == "timezone":
+        return [("POST", "/setTimeZone", {"tz": args.tz, "auto_dst": args.auto_dst})]
+    if args.command == "control":
+        return [("GET", f"/control/{args.action}", None)]
+    raise ValueError(args.command)
+
+
+async def call(session, host, method, path, data, timeout, retries):
+    url = f"http://{host}{path}"
+    last_error = None
+    for attempt in range(retries + 1):
+        try:
+            async with session.request(method, url, json=data, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                body = await response.text()
+                if response.status >= 400:
+                    raise aiohttp.ClientResponseError(
+                        response.request_info, response.history, status=response.status, message=body
+                    )
+                return body
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            last_error = e
+            if attempt < retries:
+                await asyncio.sleep(0.5 * 2 ** attempt)
+    raise last_error
+
+
+async def configure(session, semaphore, host, requests, args):
+    start = time.monotonic()
+    async with semaphore:
+        try:
+            results = []
+            for method, path, data in requests:
+                if callable(data):
+                    data = data(results[-1])
+                results.append(await call(session, host, method, path, data, args.timeout, args.retries))
+            return host, True, results[-1], time.monotonic() - start
+        except Exception as e:
+            return host, False, f"{type(e).__name__}: {e}", time.monotonic() - start
+
+
+async def run(args):
+    hosts = args.host or await discover(args.discover_timeout)
+    if not hosts:
+        print("No clocks found.")
+        return 1
+
+    requests = get_requests(args)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        results = await asyncio.gather(*(configure(session, semaphore, host, requests, args) for host in hosts))
+
+    failed = 0
+    for host, ok, message, elapsed in results:
+        if not ok:
+            failed += 1
+        print(f"{'OK  ' if ok else 'FAIL'} {host:<22} {elapsed:5.2f}s  {message.strip()}")
+    print(f"{len(results) - failed}/{len(results)} clocks succeeded")
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Configure many WordClocks concurrently")
+    parser.add_argument("--host", action="append", help="clock address (host or host:port), skips discovery")
+    parser.add_argument("--discover-timeout", type=float, default=3, help="seconds to browse mDNS")
+    parser.add_argument("--timeout", type=float, default=5, help="seconds per request")
+    parser.add_argument("--retries", type=int, default=2, help="retries per request")
+    parser.add_argument("--concurrency", type=int, default=16, help="clocks configured in parallel")
+
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status")
+    color = commands.add_parser("color")
+    color.add_argument("color", type=parse_color, help="hex color, e.g. #ff0000")
+    brightness = commands.add_parser("brightness")
+    brightness.add_argument("level", type=parse_level, help="0-100 or 'auto'")
+    timezone = commands.add_parser("timezone")
+    timezone.add_argument("tz", type=float, help="UTC offset in hours")
+    timezone.add_argument("--no-auto-dst", dest="auto_dst", action="store_false")
+    control = commands.add_parser("control")
+    control.add_argument("action", choices=["light_on", "light_off", "disable_wifi", "tz_summer", "tz_winter"])
+
+    return asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""Local stand-in clocks that mimic the routes fleet.py talks to.
+
+    python standin.py --count 3 --port 8080
+    python fleet.py --host 127.0.0.1:8080 --host 127.0.0.1:8081 --host 127.0.0.1:8082 status
+
+Every stand-in keeps its own state like the clock does and answers
+/status, /controlColor, /setTimeZone, /setBrightness and /control/<action>.
+/upload and /upload/commit take uploads from upload.py with the password
+"standin" and keep the files in memory.
+--delay makes the answers slow to exercise the timeouts of fleet.py.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import sys
+
+from aiohttp import web
+
+ACTIONS = ("light_on", "light_off", "disable_wifi", "tz_summer", "tz_winter")
+UPLOAD_PASSWORD = "standin"
+UPLOAD_CHUNK_SIZE = 1024
+
+
+def create_app(name, delay=0):
+    state = {
+        "id": name,
+        "config": {"color": {"r": 255, "g": 0, "b": 0}, "auto_brightness": True, "tz": 1, "brightness": 1.0, "auto_dst": True, "dither": False},
+        "light": True,
+        "brightness": 1.0,
+        "time": 0,
+        "link_uptime": 0,
+        "link_reconnects": 0,
+        "last_sync": 0,
+        "tz_offset": 1,
+    }
+    config = state["config"]
+    uploads = {}
+    files = {}
+
+    async def slow():
+        if delay:
+            await asyncio.sleep(delay)
+
+    async def status(request):
+        await slow()
+        return web.json_response(state)
+
+    async def control_color(request):
+        await slow()
+        data = await request.json()
+        for channel in ("r", "g", "b"):
+            config["color"][channel] = int(data.get(channel, 0))
+        return web.json_response({"msg": "Color set"})
+
+    async def set_time_zone(request):
+        await slow()
+        data = await request.json()
+        config["tz"] = float(data.get("tz", 0))
+        config["auto_dst"] = bool(data.get("auto_dst", True))
+        return web.json_response({"msg": "Timezone set"})
+
+    async def set_brightness(request):
+        await slow()
+        data = await request.json()
+        config["auto_brightness"] = bool(data.get("auto_brightness", True))
+        config["brightness"] = int(data.get("brightness", 100)) / 100.0
+        config["dither"] = bool(data.get("dither", config["dither"]))
+        state["brightness"] = config["brightness"]
+        return web.json_response({"msg": "Brightness set"})
+
+    async def control(request):
+        await slow()
+        action = request.match_info["action"]
+        if action == "light_on":
+            state["light"] = True
+        elif action == "light_off":
+            state["light"] = False
+        elif action == "tz_summer":
+            config["tz"] = 2
+        elif action == "tz_winter":
+            config["tz"] = 1
+        elif action not in ACTIONS:
+            return web.Response(text=f"Unknown action ({action})")
+        return web.Response(text=f"Action ({action}) performed")
+
+    def is_authorized(request):
+        token = base64.b64encode(f"admin:{UPLOAD_PASSWORD}".encode()).decode()
+        return request.headers.get("Authorization") == f"Basic {token}"
+
+    async def upload(request):
+        await slow()
+        if not is_authorized(request):
+            return web.json_response({"msg": "Unauthorized"}, status=401)
+        path = request.query.get("path", "")
+        try:
+            offset = int(request.query.get("offset", 0))
+        except ValueError:
+            return web.json_response({"msg": "Invalid offset"}, status=400)
+        data = await request.read()
+        if len(data) > UPLOAD_CHUNK_SIZE:
+            return web.json_response({"msg": "Chunk too large"}, status=400)
+        if offset == 0:
+            uploads[path] = b""
+        if len(uploads.get(path, b"")) != offset:
+            return web.json_response({"msg": "Unexpected offset"}, status=400)
+        uploads[path] += data
+        return web.json_response({"msg": "Chunk received", "offset": offset + len(data)})
+
+    async def upload_commit(request):
+        await slow()
+        if not is_authorized(request):
+            return web.json_response({"msg": "Unauthorized"}, status=401)
+        path = request.query.get("path", "")
+        data = uploads.pop(path, None)
+        if data is None or hashlib.sha256(data).hexdigest() != request.query.get("sha256", "").lower():
+            return web.json_response({"msg": "Checksum mismatch"}, status=400)
+        files[path] = data
+        return web.json_response({"msg": "Upload saved"})
+
+    app = web.Application()
+    app.router.add_get("/status", status)
+    app.router.add_post("/controlColor", control_color)
+    app.router.add_post("/setTimeZone", set_time_zone)
+    app.router.add_post("/setBrightness", set_brightness)
+    app.router.add_get("/control/{action}", control)
+    app.router.add_get("/control/{action}/", control)
+    app.router.add_post("/upload", upload)
+    app.router.add_post("/upload/commit", upload_commit)
+    return app
+
+
+async def start(count, host, port, delay):
+    runners = []
+    for i in range(count):
+        runner = web.AppRunner(create_app(f"standin{i}", delay))
+        await runner.setup()
+        await web.TCPSite(runner, host, port + i).start()
+        runners.append(runner)
+        print(f"Stand-in clock at {host}:{port + i}")
+    return runners
+
+
+async def serve(args):
+    runners = await start(args.count, args.bind, args.port, args.delay)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run local stand-in WordClocks")
+    parser.add_argument("--count", type=int, default=3, help="number of stand-in clocks")
+    parser.add_argument("--bind", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="port of the first clock, the others follow")
+    parser.add_argument("--delay", type=float, default=0, help="seconds before every answer")
+    try:
+        asyncio.run(serve(parser.parse_args(argv)))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
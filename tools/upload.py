@@ -0,0 +1,69 @@
+"""Upload a web asset or config.json to a WordClock without USB.
+
+    python upload.py wordclock.local style.css /www/public/style.css --password secret
+    python upload.py 192.168.1.20 config.json /config.json --password secret
+
+The clock needs "upload_password" set in its config.json. The file is sent as
+a sequence of requests, basic auth with user "admin" on each:
+
+    POST /upload?path=<path>&offset=<offset>     body: at most 1024 bytes
+    ...                                           offset: bytes sent so far
+    POST /upload/commit?path=<path>&sha256=<hex>  swap the file into place
+
+Every answer is JSON with a "msg", errors come with status 400, 401 or 403.
+"""
+import argparse
+import base64
+import hashlib
+import sys
+import urllib.error
+import urllib.parse
+import urllib.request
+
+CHUNK_SIZE = 1024
+
+
+def post(url, data, password, timeout):
+    request = urllib.request.Request(url, data=data, method="POST")
+    token = base64.b64encode(f"admin:{password}".encode()).decode()
+    request.add_header("Authorization", f"Basic {token}")
+    request.add_header("Content-Type", "application/octet-stream")
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.read().decode()
+
+
+def upload(host, local_path, remote_path, password, timeout=10):
+    with open(local_path, "rb") as fp:
+        content = fp.read()
+
+    base = f"http://{host}"
+    quoted_path = urllib.parse.quote(remote_path)
+    for offset in range(0, len(content), CHUNK_SIZE) or [0]:
+        post(f"{base}/upload?path={quoted_path}&offset={offset}", content[offset:offset + CHUNK_SIZE], password, timeout)
+
+    sha256 = hashlib.sha256(content).hexdigest()
+    return post(f"{base}/upload/commit?path={quoted_path}&sha256={sha256}", b"", password, timeout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Upload a file to a WordClock")
+    parser.add_argument("host", help="clock address (host or host:port)")
+    parser.add_argument("file", help="local file")
+    parser.add_argument("path", help="path on the clock, /config.json or /www/public/<name>")
+    parser.add_argument("--password", required=True, help="upload_password of the clock")
+    parser.add_argument("--timeout", type=float, default=10, help="seconds per request")
+    args = parser.parse_args(argv)
+
+    try:
+        print(upload(args.host, args.file, args.path, args.password, args.timeout))
+    except urllib.error.HTTPError as e:
+        print(f"Upload failed: {e.code} {e.read().decode()}")
+        return 1
+    except (OSError, urllib.error.URLError) as e:
+        print(f"Upload failed: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())